@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF 文字提取公共模块（PyMuPDF），供 test.py 等脚本复用，避免各脚本各抄一份。
+依赖: pip install pymupdf
+"""
+
+import sys
+from pathlib import Path
+
+# 使用 PyMuPDF (fitz) 读取 PDF，对中文和表格支持较好
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    print("请先安装: pip install pymupdf")
+    sys.exit(1)
+
+
+def extract(pdf_path: Path, out_path: Path, title: str = "===== BMS MODBUS 协议（从 PDF 完整提取） ====="):
+    """逐页读取 PDF 文字并直接写入输出文件，全程只过一遍，不在内存里攒全文。"""
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"找不到文件: {pdf_path}")
+    with fitz.open(pdf_path) as doc, open(out_path, "w", encoding="utf-8") as f:
+        f.write(title + "\n\n")
+        total = len(doc)
+        for i in range(total):
+            # sort=True 有助于按阅读顺序排列文字
+            text = doc[i].get_text("text", sort=True).strip()
+            if text:
+                f.write(f"========== 第 {i + 1} 页 / 共 {total} 页 ==========\n\n")
+                f.write(text)
+                f.write("\n\n")
@@ -6,10 +6,12 @@
 依赖: pip install pyserial；监测电脑温度需系统有 sensors（lm-sensors）
 """
 
+import atexit
 import sys
 import serial
 import struct
 import time
+from array import array
 from pathlib import Path
 
 try:
@@ -30,7 +32,10 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 PORT = "/dev/ttyCH341USB1"
 BAUDRATE = 9600
 ADDR = 0x0B
-TIMEOUT = 0.5
+# 9600 波特下最长应答（22 寄存器 ≈ 49 字节）约 51 ms，0.1 s 足够，失败时也不至于卡 0.5 s
+TIMEOUT = 0.1
+# 帧内字节间隔超时：整帧到齐后立刻返回，不等满 TIMEOUT
+INTER_BYTE_TIMEOUT = 0.01
 OUT_FILE = SCRIPT_DIR / "test_all.txt"
 
 # 协议中可读寄存器范围（功能码 03）
@@ -40,79 +45,279 @@ TEMP_START, TEMP_COUNT = 0x0C00, 4
 AFE_START, AFE_COUNT = 0x1000, 3
 
 
-def crc16_modbus(data: bytes) -> int:
-    crc = 0xFFFF
-    for b in data:
-        crc ^= b
+def _build_crc16_table():
+    table = array("H")
+    for b in range(256):
+        crc = b
         for _ in range(8):
             if crc & 1:
                 crc = (crc >> 1) ^ 0xA001
             else:
                 crc >>= 1
+        table.append(crc)
+    return table
+
+
+# 导入时预计算 256 项查表，每字节一次查表代替 8 次移位/异或
+_CRC16_TABLE = _build_crc16_table()
+
+
+def crc16_modbus(data: bytes, _tbl=_CRC16_TABLE) -> int:
+    crc = 0xFFFF
+    for b in data:
+        crc = (crc >> 8) ^ _tbl[(crc ^ b) & 0xFF]
     return crc & 0xFFFF
 
 
+# CRC 实现按快慢择优（CRC-16/MODBUS: poly=0x8005 反射, init=0xFFFF, xorout=0）：
+# fastcrc（Rust 扩展）> crcmod（C 扩展）> numba JIT 查表（cache=True 编译结果落盘）> 纯 Python 查表
+def _pick_crc16():
+    try:
+        from fastcrc import crc16 as _fastcrc16
+
+        def _crc_fastcrc(data, _f=_fastcrc16.modbus) -> int:
+            return _f(bytes(data))
+
+        return _crc_fastcrc
+    except ImportError:
+        pass
+    try:
+        from crcmod.predefined import mkPredefinedCrcFun
+
+        return mkPredefinedCrcFun("modbus")
+    except ImportError:
+        pass
+    try:
+        import numpy as np
+        from numba import njit
+
+        tbl_np = np.array(_CRC16_TABLE, dtype=np.uint16)
+
+        @njit(cache=True)
+        def _crc16_njit(arr, tbl):
+            crc = 0xFFFF
+            for b in arr:
+                crc = (crc >> 8) ^ tbl[(crc ^ b) & 0xFF]
+            return crc
+
+        def _crc_njit(data, _tbl=tbl_np) -> int:
+            return int(_crc16_njit(np.frombuffer(data, dtype=np.uint8), _tbl))
+
+        return _crc_njit
+    except ImportError:
+        return crc16_modbus
+
+
+crc16_modbus = _pick_crc16()
+
+
+def _set_low_latency(ser):
+    """尽量压低 USB 串口延迟，失败只提示不中断。
+    先用 pyserial 的 set_low_latency_mode（即 TIOCGSERIAL/TIOCSSERIAL 置 ASYNC_LOW_LATENCY），
+    不支持时退回写 sysfs 把 latency_timer 调到 1 ms（默认 16 ms）"""
+    try:
+        ser.set_low_latency_mode(True)
+        return
+    except (AttributeError, ValueError, OSError):
+        pass
+    name = Path(ser.port).name
+    latency = Path(f"/sys/bus/usb-serial/devices/{name}/latency_timer")
+    try:
+        latency.write_text("1")
+    except OSError:
+        print(f"提示: 无法写 {latency}，可尝试 sudo setserial {ser.port} low_latency")
+
+
+# 预编译的 struct 格式，省掉每次调用的格式串解析
+_REQ = struct.Struct(">B B H H")
+_CRC = struct.Struct("<H")
+_U16 = struct.Struct(">H")
+_U16X2 = struct.Struct(">HH")
+_I32 = struct.Struct(">i")
+_U32 = struct.Struct(">I")
+
+# 输入缓冲是否可能有残留数据：首次使用及每次出错后置 True，成功路径不再逐帧 flush
+_rx_dirty = True
+
+# 请求帧缓存：监测模式每个周期都发同样的几条请求，pack+CRC 只算一次
+_frame_cache = {}
+
+
+def _request_frame(start_addr: int, count: int) -> bytes:
+    frame = _frame_cache.get((start_addr, count))
+    if frame is None:
+        # 请求帧固定 8 字节：直接 pack_into 预分配的 bytearray，省掉两次中间 bytes 拼接
+        buf = bytearray(8)
+        _REQ.pack_into(buf, 0, ADDR, 0x03, start_addr, count)
+        _CRC.pack_into(buf, 6, crc16_modbus(memoryview(buf)[:6]))
+        frame = bytes(buf)
+        _frame_cache[(start_addr, count)] = frame
+    return frame
+
+
+# Linux 下用 poll 按帧长精确等待可读，死链路能在几十 ms 内发现；
+# 不支持 poll 的平台（如 Windows）退回 pyserial 自身的超时
+try:
+    import select
+
+    _HAVE_POLL = hasattr(select, "poll")
+except ImportError:
+    _HAVE_POLL = False
+
+_pollers = {}
+
+
+def _wait_readable(ser, nbytes: int) -> bool:
+    """等串口出现可读数据；超时 = 请求+应答在当前波特率下的线上时间 + 设备处理余量"""
+    if not _HAVE_POLL:
+        return True
+    try:
+        fd = ser.fileno()
+    except (AttributeError, OSError):
+        return True
+    poller = _pollers.get(fd)
+    if poller is None:
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        _pollers[fd] = poller
+    expected_ms = (8 + nbytes) * 10 * 1000 // BAUDRATE + 50
+    return bool(poller.poll(expected_ms))
+
+
+# 应答复用同一块预分配缓冲（readinto），循环里不再每帧新建 bytes / 拼接 / 切片拷贝
+_RESP_BUF = bytearray(260)
+_RESP_MV = memoryview(_RESP_BUF)
+
+
+def _read_exact(ser, mv) -> bool:
+    """把 mv 读满返回 True，短读返回 False。没有 readinto 的实现退回 read+拷贝"""
+    try:
+        n = ser.readinto(mv)
+    except AttributeError:
+        data = ser.read(len(mv))
+        n = len(data)
+        mv[:n] = data
+    return n == len(mv)
+
+
 def modbus_read_regs(ser, start_addr: int, count: int):
-    frame = struct.pack(">B B H H", ADDR, 0x03, start_addr, count)
-    crc = crc16_modbus(frame)
-    frame += struct.pack("<H", crc)
-    ser.reset_input_buffer()
+    global _rx_dirty
+    frame = _request_frame(start_addr, count)
+    if _rx_dirty:
+        ser.reset_input_buffer()
+        _rx_dirty = False
     ser.write(frame)
-    resp = ser.read(5 + count * 2)
-    if len(resp) < 5:
+    if not _wait_readable(ser, 5 + count * 2):
+        _rx_dirty = True
+        return None
+    # 先读 3 字节头（地址+功能码+字节数），再按字节数精确读剩余部分，
+    # 出错/异常应答时不用等满整帧超时
+    hdr = _RESP_MV[:3]
+    if not _read_exact(ser, hdr) or hdr[0] != ADDR:
+        _rx_dirty = True
+        return None
+    if hdr[1] != 0x03:
+        # 异常应答（功能码最高位置 1）：第 3 字节是异常码，后面还剩 2 字节 CRC
+        ser.read(2)
+        _rx_dirty = True
         return None
-    if resp[0] != ADDR or resp[1] != 0x03:
+    n = hdr[2]
+    # 字节数必须等于请求的寄存器数 × 2：迟到的旧应答（长度不同）CRC 也能对，
+    # 不校验会把上一笔事务的数据当本笔返回
+    if n != count * 2:
+        _rx_dirty = True
         return None
-    crc_recv = struct.unpack("<H", resp[-2:])[0]
-    if crc_recv != crc16_modbus(resp[:-2]):
+    total = 3 + n + 2
+    if total > len(_RESP_BUF) or not _read_exact(ser, _RESP_MV[3:total]):
+        _rx_dirty = True
         return None
-    data = resp[3:-2]
-    return [struct.unpack(">H", data[i : i + 2])[0] for i in range(0, len(data), 2)]
+    resp = _RESP_MV[:total]
+    crc_recv = _CRC.unpack_from(resp, total - 2)[0]
+    if crc_recv != crc16_modbus(resp[: total - 2]):
+        _rx_dirty = True
+        return None
+    # 单寄存器应答（7 字节）直接取值，省掉构造格式串和通用切片
+    if count == 1:
+        return [_U16.unpack_from(resp, 3)[0]]
+    # 寄存器批量解码：一次 frombytes + 一次 byteswap（C 级），不逐个 unpack
+    regs = array("H")
+    regs.frombytes(resp[3 : total - 2])
+    if sys.byteorder == "little":
+        regs.byteswap()
+    return regs.tolist()
+
+
+# 按起始地址记连续失败次数，满 _FAIL_WARN_EVERY 次告警一次，便于发现 RS-485 链路问题
+_FAIL_WARN_EVERY = 5
+_fail_counts = {}
+
+
+def _read_with_retry(ser, start_addr: int, count: int, tries: int = 3):
+    """modbus_read_regs 加 3 次重试（20/40/80 ms 退避），吸收偶发的帧/CRC 错误"""
+    delay = 0.02
+    for _ in range(tries):
+        r = modbus_read_regs(ser, start_addr, count)
+        if r is not None:
+            _fail_counts[start_addr] = 0
+            return r
+        time.sleep(delay)
+        delay *= 2
+    n = _fail_counts.get(start_addr, 0) + 1
+    _fail_counts[start_addr] = n
+    if n % _FAIL_WARN_EVERY == 0:
+        msg = f"WARNING: 寄存器 0x{start_addr:04X} 连续 {n} 轮读取失败"
+        if log_msg:
+            log_msg(msg)
+        print(msg)
+    return None
+
+
+def _frame_with_crc(body: bytes) -> bytes:
+    return body + _CRC.pack(crc16_modbus(body))
+
+
+# BMS ID 的两种请求帧内容固定，导入时拼好，调用时不再拼接/算 CRC
+_BMS_ID_FRAMES = (
+    _frame_with_crc(_REQ.pack(ADDR, 0x11, 0x0000, 0x0006)),
+    _frame_with_crc(struct.pack(">B B", ADDR, 0x11)),
+)
 
 
 def modbus_read_bms_id(ser):
     """功能码 0x11，读 BMS ID，12 字节。先试 0x11 + 起始 0x0000 + 长度 6 字。"""
-    for attempt in [
-        struct.pack(">B B H H", ADDR, 0x11, 0x0000, 0x0006),
-        struct.pack(">B B", ADDR, 0x11),
-    ]:
-        frame = attempt + struct.pack("<H", crc16_modbus(attempt))
-        ser.reset_input_buffer()
+    global _rx_dirty
+    for frame in _BMS_ID_FRAMES:
+        if _rx_dirty:
+            ser.reset_input_buffer()
+            _rx_dirty = False
         ser.write(frame)
         time.sleep(0.05)
         resp = ser.read(256)
-        if len(resp) >= 2 and resp[0] == ADDR and resp[1] == 0x11:
-            if len(resp) >= 4 + 2:
-                n = resp[2]
-                if n == 12 and len(resp) >= 3 + 12 + 2:
-                    payload = resp[3 : 3 + 12]
-                    if crc16_modbus(resp[: 3 + 12]) == struct.unpack("<H", resp[3 + 12 : 3 + 14])[0]:
-                        return payload
-                if n == 0x0C and len(resp) >= 17:
-                    payload = resp[3:15]
-                    if crc16_modbus(resp[:15]) == struct.unpack("<H", resp[15:17])[0]:
-                        return payload
-            if len(resp) >= 17:
-                payload = resp[3:15]
-                if crc16_modbus(resp[:15]) == struct.unpack("<H", resp[15:17])[0]:
-                    return payload
+        # 合法应答固定 17 字节：地址 + 0x11 + 字节数 + 12 字节 ID + CRC。
+        # 原来 n==12 / n==0x0C / 兜底三个分支校验窗口完全相同，收敛成一条路径，CRC 只算一次
+        if (
+            len(resp) >= 17
+            and resp[0] == ADDR
+            and resp[1] == 0x11
+            and crc16_modbus(memoryview(resp)[:15]) == _CRC.unpack_from(resp, 15)[0]
+        ):
+            return bytes(resp[3:15])
+        # 本次尝试没读到合法应答，缓冲残留未知，下一笔事务先清一次
+        _rx_dirty = True
     return None
 
 
 def u32(lo: int, hi: int) -> int:
-    return (hi << 16) | lo
+    return _U32.unpack(_U16X2.pack(hi, lo))[0]
 
 
 def s32(lo: int, hi: int) -> int:
-    val = (hi << 16) | lo
-    if val & 0x80000000:
-        val -= 0x100000000
-    return val
+    # 符号处理交给 struct 的 ">i"，不用 Python 层分支修正补码
+    return _I32.unpack(_U16X2.pack(hi, lo))[0]
 
 
-def write(f, text: str = ""):
-    f.write(text + "\n")
-    print(text)
+# 输出被重定向（如 cron/日志）时结果已在 test_all.txt 里，不再往 stdout 重复打一份
+_STDOUT_IS_TTY = sys.stdout.isatty()
 
 
 def _fmt_time(v):
@@ -120,16 +325,23 @@ def _fmt_time(v):
 
 
 def read_bms_temps_c(ser):
-    """读取 BMS 温度寄存器，返回 [MAX, MIN, Temp1, Temp2] 单位 ℃，失败返回 None"""
-    r = modbus_read_regs(ser, TEMP_START, TEMP_COUNT)
+    """读取 BMS 温度寄存器，返回 (最低, 最高) 单位 ℃，失败返回 None。
+    在原始寄存器上单遍取极值，只换算两次 K→℃，不构造中间浮点列表"""
+    r = _read_with_retry(ser, TEMP_START, TEMP_COUNT)
     if not r:
         return None
-    return [(v - 2731) / 10 for v in r]
+    lo = hi = r[0]
+    for v in r[1:]:
+        if v < lo:
+            lo = v
+        elif v > hi:
+            hi = v
+    return ((lo - 2731) / 10, (hi - 2731) / 10)
 
 
 def read_bms_soc_and_current(ser):
     """读取 PACK 前 2 个寄存器（电流 L/H）和 SOC，返回 (soc_percent, current_mA)。失败返回 (None, None)"""
-    r = modbus_read_regs(ser, PACK_START, 0x12)
+    r = _read_with_retry(ser, PACK_START, 0x12)
     if not r or len(r) < 18:
         return (None, None)
     current_mA = s32(r[0], r[1])
@@ -137,177 +349,235 @@ def read_bms_soc_and_current(ser):
     return (soc, current_mA)
 
 
+# 可打印 ASCII（0x20-0x7E）以外的字节集合，translate 的 delete 参数一遍删完
+_NON_PRINTABLE = bytes(b for b in range(256) if not (32 <= b < 127))
+
+
 def _fmt_bms_id_ascii(b):
-    return "".join(c if 32 <= ord(c) < 127 else "" for c in b.decode("latin-1")).strip() or "—"
+    return b.translate(None, _NON_PRINTABLE).decode("ascii").strip() or "—"
+
+
+# 各状态字的位名（bit0 在前），模块级元组，解码时不再每次调用重建列表
+_BATTERY_STATUS_NAMES = (
+    "容量自修正", "循环计数", "内阻更新", "电池放空", "电池充满", "休眠",
+    "AFE数据读取", "剩余时间", "OCV修正", "LED指示", "弱电开关", "保留",
+    "校准使能", "CC偏移", "通讯中", "程序激活",
+)
+_ALARM_SAFETY_NAMES = (
+    "单节欠压", "放电过流", "短路", "放电过温", "剩余容量保护", "放电低温",
+    "保留", "保留", "单节过压", "充电过流", "充电过温", "充电低温",
+    "保留", "保留", "保留", "告警",
+)
+_AFE_STATUS_NAMES = (
+    "充电MOS", "放电MOS", "预充", "中断", "电压中断", "温度中断", "电流中断",
+    "负载", "充电器", "放电中", "充电中", "通讯", "看门狗", "均衡开", "唤醒", "休眠",
+)
+_AFE_SAFETY_NAMES = (
+    "过压", "短路", "欠压", "充电过流", "放电过流1", "放电过流2",
+    "放电低温", "放电高温", "充电低温", "充电高温",
+)
 
 
 def _decode_battery_status(v):
     """BatteryStatus 位 → 中文"""
-    names = [
-        "容量自修正", "循环计数", "内阻更新", "电池放空", "电池充满", "休眠",
-        "AFE数据读取", "剩余时间", "OCV修正", "LED指示", "弱电开关", "保留",
-        "校准使能", "CC偏移", "通讯中", "程序激活",
-    ]
-    return _bits_to_names(v, names)
+    return _bits_to_names(v, _BATTERY_STATUS_NAMES)
 
 
 def _decode_alarm_safety(v):
-    """BatteryAlarm / BatterySafety / AFE保护 位 → 中文"""
-    names = [
-        "单节欠压", "放电过流", "短路", "放电过温", "剩余容量保护", "放电低温",
-        "保留", "保留", "单节过压", "充电过流", "充电过温", "充电低温",
-        "保留", "保留", "保留", "告警",
-    ]
-    return _bits_to_names(v, names)
+    """BatteryAlarm / BatterySafety 位 → 中文"""
+    return _bits_to_names(v, _ALARM_SAFETY_NAMES)
 
 
 def _decode_afe_status(v):
     """AFE 状态位 → 中文"""
-    names = [
-        "充电MOS", "放电MOS", "预充", "中断", "电压中断", "温度中断", "电流中断",
-        "负载", "充电器", "放电中", "充电中", "通讯", "看门狗", "均衡开", "唤醒", "休眠",
-    ]
-    return _bits_to_names(v, names)
+    return _bits_to_names(v, _AFE_STATUS_NAMES)
 
 
 def _decode_afe_safety(v):
     """AFE 保护位 → 中文"""
-    names = [
-        "过压", "短路", "欠压", "充电过流", "放电过流1", "放电过流2",
-        "放电低温", "放电高温", "充电低温", "充电高温",
-    ]
-    return _bits_to_names(v, names[:10])
+    return _bits_to_names(v, _AFE_SAFETY_NAMES)
 
 
 def _bits_to_names(val, names):
-    """按位取 1 的名称列表，用空格拼成一句"""
+    """按位取 1 的名称列表，用空格拼成一句。只遍历置 1 的位，常见的 0 值直接返回"""
+    if not val:
+        return "无"
     out = []
-    for i, name in enumerate(names):
-        if i < 16 and (val >> i) & 1:
-            out.append(name)
+    n = len(names)
+    while val:
+        low = val & -val
+        i = low.bit_length() - 1
+        if i < n:
+            out.append(names[i])
+        val ^= low
     return " ".join(out) if out else "无"
 
 
-def main():
-    ser = serial.Serial(
-        port=PORT,
-        baudrate=BAUDRATE,
-        bytesize=8,
-        parity="N",
-        stopbits=1,
-        timeout=TIMEOUT,
-    )
-
-    with open(OUT_FILE, "w", encoding="utf-8") as f:
-        write(f, "===== BMS 全参数扫描结果（test_all.py 实际读取） =====\n")
-
-        # ---------- BMS ID -----------
-        write(f, "[设备]")
-        bms_id = modbus_read_bms_id(ser)
-        if bms_id:
-            write(f, f"  设备ID  {_fmt_bms_id_ascii(bms_id)}")
-        else:
-            write(f, "  设备ID  未读取到")
-
-        # ---------- PACK 信息 0x0400-0x0415 ----------
-        write(f, "\n[PACK 信息]")
-        regs = modbus_read_regs(ser, PACK_START, PACK_COUNT)
-        if regs:
-            current = s32(regs[0], regs[1])
-            rem_cap = u32(regs[2], regs[3])
-            full_cap = u32(regs[4], regs[5])
-            charge_current = u32(regs[6], regs[7])
-            charge_voltage = u32(regs[8], regs[9])
-            pack_voltage = u32(regs[10], regs[11])
-            batt_voltage = u32(regs[12], regs[13])
-            cycle = regs[14]
-            t_empty = regs[15]
-            t_full = regs[16]
-            soc = regs[17]
-            soh = regs[18]
-            battery_status = regs[19]
-            battery_alarm = regs[20]
-            battery_safety = regs[21]
-
-            L = 20
-            write(f, f"  {'电池电流':<{L}} {current / 1000:>6.2f} A")
-            write(f, f"  {'剩余容量':<{L}} {rem_cap:>6} mAh")
-            write(f, f"  {'满充容量':<{L}} {full_cap:>6} mAh")
-            write(f, f"  {'充电电流':<{L}} {charge_current / 1000:>6.2f} A")
-            write(f, f"  {'充电电压':<{L}} {charge_voltage / 1000:>6.2f} V")
-            write(f, f"  {'PACK 总电压':<{L}} {pack_voltage / 1000:>6.2f} V")
-            write(f, f"  {'电池电压':<{L}} {batt_voltage / 1000:>6.2f} V")
-            write(f, f"  {'循环次数':<{L}} {cycle:>6}")
-            write(f, f"  {'剩余可用时间':<{L}} {_fmt_time(t_empty):>6}")
-            write(f, f"  {'充满所需时间':<{L}} {_fmt_time(t_full):>6}")
-            write(f, f"  {'SOC':<{L}} {soc:>6} %")
-            write(f, f"  {'SOH':<{L}} {soh:>6} %")
-            write(f, f"  {'电池状态':<{L}} {_decode_battery_status(battery_status)}")
-            write(f, f"  {'告警':<{L}} {_decode_alarm_safety(battery_alarm)}")
-            write(f, f"  {'保护':<{L}} {_decode_alarm_safety(battery_safety)}")
-        else:
-            write(f, "  读取失败（请检查串口、地址与接线）")
-
-        # ---------- 单体电压 0x0800-0x080F+ ----------
-        write(f, "\n[单体电压]")
-        vregs = modbus_read_regs(ser, VOLT_START, VOLT_COUNT)
-        if vregs:
-            write(f, f"  最高  {vregs[0]:>5} mV    最低  {vregs[1]:>5} mV")
-            for i in range(2, VOLT_COUNT):
-                val = vregs[i]
-                cell = f"Cell {i - 1:02d}"
-                s = f"{val} mV" if val else "—"
-                write(f, f"  {cell}  {s:>10}")
-        else:
-            write(f, "  读取失败")
-
-        # ---------- 温度 0x0C00-0x0C03 ----------
-        write(f, "\n[温度]")
-        tregs = modbus_read_regs(ser, TEMP_START, TEMP_COUNT)
-        if tregs:
-            labels = ["MAX", "MIN", "Temp1", "Temp2"]
-            parts = [f"{labels[i]} {(tregs[i] - 2731) / 10:.1f} ℃" for i in range(TEMP_COUNT)]
-            write(f, "  " + "    ".join(parts))
-        else:
-            write(f, "  读取失败")
-
-        # ---------- 状态（人可读）----------
-        write(f, "\n[状态]")
-        afe_status = modbus_read_regs(ser, 0x1000, 1)
-        afe_safety = modbus_read_regs(ser, 0x1001, 1)
-        balance = modbus_read_regs(ser, 0x1002, 1)
-        if afe_status is not None and afe_safety is not None and balance is not None:
-            write(f, f"  运行   {_decode_afe_status(afe_status[0])}")
-            write(f, f"  保护   {_decode_afe_safety(afe_safety[0])}")
-            write(f, f"  均衡   {'均衡中' if balance[0] else '未均衡'}")
-        else:
-            write(f, "  读取失败")
-
-        write(f, "\n===== 扫描结束 =====")
-
-    ser.close()
-    print(f"结果已写入: {OUT_FILE}")
+# 串口句柄整进程共用：打开 + termios 配置只做一次，退出时统一关闭
+_ser_cached = None
 
 
-def run_monitor():
-    """持续监测：电池温度 + 电脑温度，合并输出；超阈值写日志告警。"""
-    print("持续监测温度（电池 + CPU + NVMe），按 Ctrl+C 退出\n")
-    try:
-        ser = serial.Serial(
+def _get_ser():
+    global _ser_cached
+    if _ser_cached is None or not getattr(_ser_cached, "is_open", True):
+        _ser_cached = serial.Serial(
             port=PORT,
             baudrate=BAUDRATE,
             bytesize=8,
             parity="N",
             stopbits=1,
             timeout=TIMEOUT,
+            inter_byte_timeout=INTER_BYTE_TIMEOUT,
         )
-    except Exception as e:
-        print(f"串口打开失败: {e}，仅显示电脑温度")
-        ser = None
+        _set_low_latency(_ser_cached)
+    return _ser_cached
+
+
+def _close_ser():
+    global _ser_cached
+    if _ser_cached is not None:
+        try:
+            _ser_cached.close()
+        except Exception:
+            pass
+        _ser_cached = None
+
+
+atexit.register(_close_ser)
+
+
+def main(ser=None):
+    if ser is None:
+        ser = _get_ser()
+
+    # 扫描行先攒在内存里，结束时一次性落盘/回显，避免每行两次写 I/O
+    lines = []
+
+    def w(text: str = ""):
+        lines.append(text)
+
+    w("===== BMS 全参数扫描结果（test_all.py 实际读取） =====\n")
+
+    # ---------- BMS ID -----------
+    w("[设备]")
+    bms_id = modbus_read_bms_id(ser)
+    if bms_id:
+        w(f"  设备ID  {_fmt_bms_id_ascii(bms_id)}")
+    else:
+        w("  设备ID  未读取到")
+
+    # ---------- PACK 信息 0x0400-0x0415 ----------
+    w("\n[PACK 信息]")
+    regs = _read_with_retry(ser, PACK_START, PACK_COUNT)
+    if regs:
+        current = s32(regs[0], regs[1])
+        rem_cap = u32(regs[2], regs[3])
+        full_cap = u32(regs[4], regs[5])
+        charge_current = u32(regs[6], regs[7])
+        charge_voltage = u32(regs[8], regs[9])
+        pack_voltage = u32(regs[10], regs[11])
+        batt_voltage = u32(regs[12], regs[13])
+        cycle = regs[14]
+        t_empty = regs[15]
+        t_full = regs[16]
+        soc = regs[17]
+        soh = regs[18]
+        battery_status = regs[19]
+        battery_alarm = regs[20]
+        battery_safety = regs[21]
+
+        L = 20
+        w(f"  {'电池电流':<{L}} {current / 1000:>6.2f} A")
+        w(f"  {'剩余容量':<{L}} {rem_cap:>6} mAh")
+        w(f"  {'满充容量':<{L}} {full_cap:>6} mAh")
+        w(f"  {'充电电流':<{L}} {charge_current / 1000:>6.2f} A")
+        w(f"  {'充电电压':<{L}} {charge_voltage / 1000:>6.2f} V")
+        w(f"  {'PACK 总电压':<{L}} {pack_voltage / 1000:>6.2f} V")
+        w(f"  {'电池电压':<{L}} {batt_voltage / 1000:>6.2f} V")
+        w(f"  {'循环次数':<{L}} {cycle:>6}")
+        w(f"  {'剩余可用时间':<{L}} {_fmt_time(t_empty):>6}")
+        w(f"  {'充满所需时间':<{L}} {_fmt_time(t_full):>6}")
+        w(f"  {'SOC':<{L}} {soc:>6} %")
+        w(f"  {'SOH':<{L}} {soh:>6} %")
+        w(f"  {'电池状态':<{L}} {_decode_battery_status(battery_status)}")
+        w(f"  {'告警':<{L}} {_decode_alarm_safety(battery_alarm)}")
+        w(f"  {'保护':<{L}} {_decode_alarm_safety(battery_safety)}")
+    else:
+        w("  读取失败（请检查串口、地址与接线）")
+
+    # ---------- 单体电压 0x0800-0x080F+ ----------
+    w("\n[单体电压]")
+    vregs = _read_with_retry(ser, VOLT_START, VOLT_COUNT)
+    if vregs:
+        w(f"  最高  {vregs[0]:>5} mV    最低  {vregs[1]:>5} mV")
+        for i in range(2, VOLT_COUNT):
+            val = vregs[i]
+            cell = f"Cell {i - 1:02d}"
+            s = f"{val} mV" if val else "—"
+            w(f"  {cell}  {s:>10}")
+    else:
+        w("  读取失败")
+
+    # ---------- 温度 0x0C00-0x0C03 ----------
+    w("\n[温度]")
+    tregs = _read_with_retry(ser, TEMP_START, TEMP_COUNT)
+    if tregs:
+        labels = ["MAX", "MIN", "Temp1", "Temp2"]
+        parts = [f"{labels[i]} {(tregs[i] - 2731) / 10:.1f} ℃" for i in range(TEMP_COUNT)]
+        w("  " + "    ".join(parts))
+    else:
+        w("  读取失败")
+
+    # ---------- 状态（人可读）----------
+    w("\n[状态]")
+    aregs = _read_with_retry(ser, AFE_START, AFE_COUNT)
+    if aregs is not None:
+        afe_status, afe_safety, balance = aregs[0], aregs[1], aregs[2]
+        w(f"  运行   {_decode_afe_status(afe_status)}")
+        w(f"  保护   {_decode_afe_safety(afe_safety)}")
+        w(f"  均衡   {'均衡中' if balance else '未均衡'}")
+    else:
+        w("  读取失败")
+
+    w("\n===== 扫描结束 =====")
+
+    payload = "\n".join(lines) + "\n"
+    with open(OUT_FILE, "w", encoding="utf-8") as f:
+        f.write(payload)
+    if _STDOUT_IS_TTY:
+        sys.stdout.write(payload)
+    print(f"结果已写入: {OUT_FILE}")
+
+
+# 监测输出的时间戳按整秒缓存，周期小于 1 s 时同一秒不重复 strftime
+_last_mon_sec = -1
+_last_mon_ts = ""
+
+
+def _monitor_ts() -> str:
+    global _last_mon_sec, _last_mon_ts
+    sec = int(time.time())
+    if sec != _last_mon_sec:
+        _last_mon_ts = time.strftime("%H:%M:%S", time.localtime(sec))
+        _last_mon_sec = sec
+    return _last_mon_ts
+
+
+def run_monitor(ser=None):
+    """持续监测：电池温度 + 电脑温度，合并输出；超阈值写日志告警。"""
+    print("持续监测温度（电池 + CPU + NVMe），按 Ctrl+C 退出\n")
+    if ser is None:
+        try:
+            ser = _get_ser()
+        except Exception as e:
+            print(f"串口打开失败: {e}，仅显示电脑温度")
+            ser = None
     if log_msg:
         log_msg("BMS+系统温度监测已启动")
 
     try:
+        # 按 monotonic 时钟对齐固定节拍，处理耗时不会累积成漂移
+        next_tick = time.monotonic()
         while True:
             parts = []
             # 电池：百分比 + 是否充电 + 温度（范围，直观）
@@ -325,7 +595,7 @@ def run_monitor():
                 else:
                     charge_s = ""
                 if bms is not None:
-                    t_min, t_max = min(bms), max(bms)
+                    t_min, t_max = bms
                     if t_min == t_max:
                         temp_s = f"{t_min:.0f}℃"
                     else:
@@ -355,14 +625,12 @@ def run_monitor():
                 parts.append("CPU/NVMe(未安装 test_system_temp 或 sensors)")
 
             line = " | ".join(parts)
-            ts = time.strftime("%H:%M:%S", time.localtime())
+            ts = _monitor_ts()
             print(f"[{ts}] {line}")
-            time.sleep(TEMP_INTERVAL)
+            next_tick += TEMP_INTERVAL
+            time.sleep(max(0.0, next_tick - time.monotonic()))
     except KeyboardInterrupt:
         print("\n监测已停止")
-    finally:
-        if ser is not None:
-            ser.close()
 
 
 if __name__ == "__main__":
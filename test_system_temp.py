@@ -6,6 +6,7 @@
 依赖: 系统已安装 lm-sensors，命令行有 sensors
 """
 
+import os
 import re
 import subprocess
 import time
@@ -15,54 +16,142 @@ from pathlib import Path
 CPU_WARN = 85
 NVME_WARN = 75
 LOG_FILE = Path.home() / "temp_monitor.log"
+MAX_LOG_SIZE = 200 * 1024  # 超过后把旧日志改名为 .1，重新开新文件
 INTERVAL = 2
 # =========================
 
 
-def get_cpu_temp():
-    """从 sensors 解析 CPU Package 温度，返回 float(℃) 或 None"""
+# 优先直接读 /sys/class/hwmon 的温度文件（内核原生接口，纯整数，无需起子进程和解析文本），
+# 找不到对应节点再退回 sensors 子进程
+_hwmon_paths = None
+
+
+def _find_hwmon_paths():
+    """扫描 /sys/class/hwmon，返回 {'cpu': temp 文件路径或 None, 'nvme': 同}"""
+    found = {"cpu": None, "nvme": None}
+    for hwmon in sorted(Path("/sys/class/hwmon").glob("hwmon*")):
+        try:
+            name = (hwmon / "name").read_text().strip()
+        except OSError:
+            continue
+        if name in ("coretemp", "k10temp", "cpu_thermal"):
+            kind = "cpu"
+        elif name == "nvme":
+            kind = "nvme"
+        else:
+            continue
+        temp = hwmon / "temp1_input"
+        if found[kind] is None and temp.exists():
+            found[kind] = temp
+    return found
+
+
+def _read_hwmon(kind: str):
+    """读取缓存好的 hwmon 温度文件，返回 float(℃)；无节点或读失败返回 None"""
+    global _hwmon_paths
+    if _hwmon_paths is None:
+        _hwmon_paths = _find_hwmon_paths()
+    path = _hwmon_paths[kind]
+    if path is None:
+        return None
     try:
-        out = subprocess.check_output(["sensors"], text=True, timeout=5)
-    except (FileNotFoundError, subprocess.CalledProcessError):
+        return int(path.read_text()) / 1000.0
+    except (OSError, ValueError):
         return None
-    for line in out.splitlines():
+
+
+_TEMP_RE = re.compile(r"\+(\d+\.?\d*)\s*°?C")
+
+# sensors 输出按时间缓存：同一周期里 CPU/NVMe 两次取温只起一个子进程
+_sensors_cache = ("", float("-inf"))
+
+
+def _sensors_output(ttl: float = 0.5) -> str:
+    global _sensors_cache
+    out, ts = _sensors_cache
+    now = time.monotonic()
+    if now - ts > ttl:
+        try:
+            out = subprocess.check_output(["sensors"], text=True, timeout=5)
+        except (FileNotFoundError, subprocess.CalledProcessError):
+            out = ""
+        _sensors_cache = (out, now)
+    return out
+
+
+def get_cpu_temp():
+    """CPU 温度，返回 float(℃) 或 None。先走 hwmon，退回 sensors 解析"""
+    t = _read_hwmon("cpu")
+    if t is not None:
+        return t
+    for line in _sensors_output().splitlines():
         if "Package id 0" in line or "Core 0" in line:
-            m = re.search(r"\+(\d+\.?\d*)\s*°?C", line)
+            m = _TEMP_RE.search(line)
             if m:
                 return float(m.group(1))
     return None
 
 
 def get_nvme_temp():
-    """从 sensors 解析 NVMe Composite 温度，返回 float(℃) 或 None"""
-    try:
-        out = subprocess.check_output(["sensors"], text=True, timeout=5)
-    except (FileNotFoundError, subprocess.CalledProcessError):
-        return None
-    lines = out.splitlines()
+    """NVMe 温度，返回 float(℃) 或 None。先走 hwmon，退回 sensors 解析"""
+    t = _read_hwmon("nvme")
+    if t is not None:
+        return t
     in_nvme = False
-    for line in lines:
+    for line in _sensors_output().splitlines():
         if "nvme" in line.lower() and "pci" in line.lower():
             in_nvme = True
             continue
         if in_nvme and "Composite" in line:
-            m = re.search(r"\+(\d+\.?\d*)\s*°?C", line)
+            m = _TEMP_RE.search(line)
             if m:
                 return float(m.group(1))
             in_nvme = False
     return None
 
 
+# 时间串按整秒缓存：同一秒内的多条日志不再重复走 localtime/strftime
+_last_log_sec = -1
+_last_log_ts = ""
+
+
+def _log_ts() -> str:
+    global _last_log_sec, _last_log_ts
+    sec = int(time.time())
+    if sec != _last_log_sec:
+        _last_log_ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+        _last_log_sec = sec
+    return _last_log_ts
+
+
+# 日志文件句柄常开，按近似字节数计数，满了用 rename 轮转（O(1)，不整读整写旧文件）
+_log_fh = None
+_log_size = 0
+
+
 def log_msg(msg: str):
-    t = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{t} | {msg}\n")
+    global _log_fh, _log_size
+    t = _log_ts()
+    line = f"{t} | {msg}\n"
+    if _log_fh is None:
+        _log_fh = open(LOG_FILE, "a", encoding="utf-8")
+        _log_size = _log_fh.tell()
+    elif _log_size >= MAX_LOG_SIZE:
+        _log_fh.close()
+        os.replace(LOG_FILE, f"{LOG_FILE}.1")
+        _log_fh = open(LOG_FILE, "a", encoding="utf-8")
+        _log_size = 0
+    _log_fh.write(line)
+    _log_fh.flush()
+    _log_size += len(line)
 
 
 def run_standalone():
     """独立运行：仅监测电脑温度，循环打印并写日志"""
     print("Starting temperature monitor (CPU + NVMe)...")
     log_msg("Temperature monitor started.")
+    # 按 monotonic 时钟对齐固定节拍，sensors 偶尔变慢也不会让采样点漂移
+    next_tick = time.monotonic()
     while True:
         cpu = get_cpu_temp()
         nvme = get_nvme_temp()
@@ -75,7 +164,8 @@ def run_standalone():
         if nvme is not None and nvme > NVME_WARN:
             log_msg(f"WARNING: NVMe Overheat {nvme:.1f}°C")
             print("⚠ NVMe Overheat!")
-        time.sleep(INTERVAL)
+        next_tick += INTERVAL
+        time.sleep(max(0.0, next_tick - time.monotonic()))
 
 
 if __name__ == "__main__":